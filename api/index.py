@@ -1,6 +1,10 @@
 import sys
 import os
 
+# Vercel's proxy sets X-Forwarded-For to the real client address; without this
+# every caller would share the proxy's write rate-limit bucket
+os.environ.setdefault("TRUSTED_PROXY", "true")
+
 # Add the backend directory to sys.path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
@@ -0,0 +1,73 @@
+import asyncio
+from typing import Callable, Coroutine, Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from app.core.config import settings
+
+class CoalescingStats:
+    def __init__(self):
+        self.requests = 0
+        self.computations = 0
+
+    def as_dict(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "computations": self.computations,
+            "coalesced": self.requests - self.computations,
+            "ratio": round(self.requests / self.computations, 2) if self.computations else 1.0,
+        }
+
+stats = CoalescingStats()
+_in_flight: Dict[Tuple, "asyncio.Task[Response]"] = {}
+
+def canonical_query(query_string: bytes, precision: int) -> Optional[str]:
+    # Rounds lat/lon to `precision` decimals and sorts the parameters. Returns None
+    # for requests without valid coordinates, which are left untouched.
+    params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    names = {k for k, _ in params}
+    if "lat" not in names or "lon" not in names:
+        return None
+    canonical = []
+    for k, v in params:
+        if k in ("lat", "lon"):
+            try:
+                v = repr(round(float(v), precision) + 0.0)
+            except ValueError:
+                return None
+        canonical.append((k, v))
+    return urlencode(sorted(canonical))
+
+class CoalescingRoute(APIRoute):
+    # Edge layer for coordinate lookups: GET requests carrying lat/lon are
+    # canonicalised to settings.COORD_PRECISION, and identical requests that arrive
+    # while one is in flight await that request's Response (and its serialised
+    # body) instead of validating, computing and serialising again.
+    #
+    # Requests are matched on path and query only, and followers receive a Response
+    # computed in the first caller's scope. Opt routes in individually, and only when
+    # they have no side effects, no yield dependencies and do not read headers.
+    # settings.COALESCE_REQUESTS turns the whole layer off.
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+
+        async def coalescing_handler(request: Request) -> Response:
+            if not settings.COALESCE_REQUESTS or request.method != "GET":
+                return await handler(request)
+            query = canonical_query(request.scope["query_string"], settings.COORD_PRECISION)
+            if query is None:
+                return await handler(request)
+
+            request.scope["query_string"] = query.encode("latin-1")
+            key = (request.scope["path"], query)
+            stats.requests += 1
+            task = _in_flight.get(key)
+            if task is None:
+                stats.computations += 1
+                task = asyncio.ensure_future(handler(request))
+                _in_flight[key] = task
+                task.add_done_callback(lambda _: _in_flight.pop(key, None))
+            # Shielded so a disconnecting caller does not cancel the shared computation
+            return await asyncio.shield(task)
+
+        return coalescing_handler
@@ -1,35 +1,56 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, Response
+from fastapi import APIRouter, HTTPException, Query, Depends, Response, Request, Header
 from app.schemas.environmental import (
     Metric, MapData, GeocodeResult, Overview, SearchHistory, 
     ReportRequest, ReportResponse, InsightResponse, ForecastResponse,
-    ImpactScoreResponse, ImpactSimulationResponse, JoinRequest, JoinResponse
+    ImpactScoreResponse, ImpactSimulationResponse, ImpactScenarioResponse,
+    JoinRequest, JoinResponse, EdgeStatsResponse
+)
+from app.services.weather_service import (
+    WeatherService, MetricSet, Coordinates,
+    get_coordinates, get_coordinates_or_origin, get_metrics, get_metrics_or_origin
 )
-from app.services.weather_service import WeatherService
 from app.services.ai_service import AIService
+from app.services.simulation_service import SimulationService
+from app.api import edge
+from app.api.edge import CoalescingRoute
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.idempotency import IdempotencyStore
+from app.core.rate_limit import RateLimiter, client_id
 from app.models.history import SearchHistory as SearchHistoryModel, EnvironmentalReport as ReportModel, ClimateAction as ClimateActionModel
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional
 import json
 
 router = APIRouter()
+# Pure coordinate lookups that are safe to coalesce (see CoalescingRoute): no DB
+# session or other yield dependencies, no writes, nothing read from headers.
+# Included into `router` at the bottom of this module.
+coalesced_router = APIRouter(route_class=CoalescingRoute)
+
+# Guards for the SQLite writer: POST /report and /join share one per-client budget
+write_limiter = RateLimiter(settings.WRITE_RATE_PER_SECOND, settings.WRITE_BURST)
+idempotency_store = IdempotencyStore(settings.IDEMPOTENCY_TTL_SECONDS)
 
-@router.get("/snapshot", response_model=List[Metric])
-async def get_snapshot(lat: float = 0, lon: float = 0):
-    return await WeatherService.get_air_pollution(lat, lon)
+@coalesced_router.get("/snapshot", response_model=List[Metric])
+async def get_snapshot(metrics: MetricSet = Depends(get_metrics_or_origin)):
+    return list(metrics)
 
-@router.get("/map", response_model=MapData)
-async def get_map_data(lat: float = 0, lon: float = 0, layer: str = "air"):
+@coalesced_router.get("/map", response_model=MapData)
+async def get_map_data(layer: str = "air", coords: Coordinates = Depends(get_coordinates_or_origin)):
+    # Depending on coords and metrics separately would validate lat/lon twice
+    lat, lon = coords
+    metrics = await get_metrics(coords)
     # Get real AQI to influence map data
-    metrics = await WeatherService.get_air_pollution(lat, lon)
-    aqi_metric = next((m for m in metrics if m["title"] == "Air Quality"), None)
-    base_severity = aqi_metric["risk"] if aqi_metric else "moderate"
+    base_severity = metrics.risk_level
     
     # Generate zones based on the selected layer
     zones = []
     if layer == "air":
         zones = [
-            {"lat": lat + 0.005, "lon": lon + 0.005, "severity": base_severity, "tooltip": f"Air Station Alpha: {aqi_metric['value'] if aqi_metric else 50} AQI"},
+            {"lat": lat + 0.005, "lon": lon + 0.005, "severity": base_severity, "tooltip": f"Air Station Alpha: {metrics.aqi} AQI"},
             {"lat": lat - 0.008, "lon": lon + 0.012, "severity": "high", "tooltip": "Traffic Hotspot - High NO2"},
             {"lat": lat + 0.012, "lon": lon - 0.015, "severity": "low", "tooltip": "Urban Forest - Clean Air Zone"}
         ]
@@ -84,6 +105,10 @@ async def geocode(q: str, db: Session = Depends(get_db)):
 async def get_history(db: Session = Depends(get_db)):
     return db.query(SearchHistoryModel).order_by(SearchHistoryModel.timestamp.desc()).limit(10).all()
 
+@router.get("/edge-stats", response_model=EdgeStatsResponse)
+async def get_edge_stats():
+    return edge.stats.as_dict()
+
 @router.get("/overview", response_model=Overview)
 async def get_overview():
     return {
@@ -93,13 +118,25 @@ async def get_overview():
     }
 
 @router.post("/report", response_model=ReportResponse)
-async def generate_report(request: ReportRequest, db: Session = Depends(get_db)):
+async def generate_report(
+    request: ReportRequest,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    replay_key = ("report", idempotency_key)
+    payload = (request.lat, request.lon, request.name)
+    if idempotency_key:
+        cached = idempotency_store.get(replay_key, payload)
+        if cached is not None:
+            return cached
+
+    # Only fetched once a replay has been ruled out
     metrics = await WeatherService.get_air_pollution(request.lat, request.lon)
-    
+
     # Simple synthesis for report
-    aqi_metric = next((m for m in metrics if m["title"] == "Air Quality"), None)
-    aqi_value = aqi_metric["value"] if aqi_metric else 50
-    risk_level = aqi_metric["risk"] if aqi_metric else "moderate"
+    aqi_value = metrics.aqi
+    risk_level = metrics.risk_level
     
     summary = f"ECOLENS AI ENVIRONMENTAL ANALYSIS REPORT\n"
     summary += f"======================================\n"
@@ -110,20 +147,34 @@ async def generate_report(request: ReportRequest, db: Session = Depends(get_db))
     summary += f"Detailed Assessment:\n"
     for m in metrics:
         summary += f"- {m['title']}: {m['value']} ({m['risk']} risk) - {m['description']}\n"
-    
-    new_report = ReportModel(
-        location_name=request.name,
-        lat=request.lat,
-        lon=request.lon,
-        aqi_value=aqi_value,
-        risk_level=risk_level,
-        summary=summary
-    )
-    db.add(new_report)
-    db.commit()
-    db.refresh(new_report)
-    
-    return new_report
+
+    # Reuse an identical report generated recently for the same location
+    recent = db.query(ReportModel).filter(
+        ReportModel.lat == request.lat,
+        ReportModel.lon == request.lon,
+        ReportModel.location_name == request.name,
+        ReportModel.timestamp >= datetime.utcnow() - timedelta(seconds=settings.REPORT_REUSE_SECONDS),
+    ).order_by(ReportModel.timestamp.desc()).first()
+    if recent is not None and recent.summary == summary:
+        new_report = recent
+    else:
+        write_limiter.check(client_id(http_request))
+        new_report = ReportModel(
+            location_name=request.name,
+            lat=request.lat,
+            lon=request.lon,
+            aqi_value=aqi_value,
+            risk_level=risk_level,
+            summary=summary
+        )
+        db.add(new_report)
+        db.commit()
+        db.refresh(new_report)
+
+    response = ReportResponse.model_validate(new_report)
+    if idempotency_key:
+        idempotency_store.put(replay_key, payload, response)
+    return response
 
 @router.get("/reports", response_model=List[ReportResponse])
 async def get_reports(db: Session = Depends(get_db)):
@@ -144,9 +195,8 @@ async def download_report(report_id: int, db: Session = Depends(get_db)):
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
-@router.get("/insights", response_model=InsightResponse)
-async def get_ai_insights(lat: float, lon: float):
-    metrics = await WeatherService.get_air_pollution(lat, lon)
+@coalesced_router.get("/insights", response_model=InsightResponse)
+async def get_ai_insights(metrics: MetricSet = Depends(get_metrics)):
     summary = await AIService.generate_insights(metrics)
     action_plan = await AIService.get_action_plan(metrics)
     
@@ -156,12 +206,12 @@ async def get_ai_insights(lat: float, lon: float):
         "confidence_score": 0.92
     }
 
-@router.get("/forecast", response_model=ForecastResponse)
-async def get_forecast(lat: float, lon: float):
+@coalesced_router.get("/forecast", response_model=ForecastResponse)
+async def get_forecast(coords: Coordinates = Depends(get_coordinates)):
+    lat, lon = coords
+    metrics = await get_metrics(coords)
     # Dynamic forecast based on real-time snapshot
-    metrics = await WeatherService.get_air_pollution(lat, lon)
-    aqi_metric = next((m for m in metrics if m["title"] == "Air Quality"), None)
-    base_aqi = aqi_metric["value"] if aqi_metric else 50
+    base_aqi = metrics.aqi
     
     forecast = []
     days = ["Today", "Day 2", "Day 3", "Day 4", "Day 5", "Day 6", "Day 7"]
@@ -182,11 +232,9 @@ async def get_forecast(lat: float, lon: float):
         
     return {"forecast": forecast}
 
-@router.get("/impact-score", response_model=ImpactScoreResponse)
-async def get_impact_score(lat: float, lon: float):
-    metrics = await WeatherService.get_air_pollution(lat, lon)
-    aqi_metric = next((m for m in metrics if m["title"] == "Air Quality"), None)
-    aqi_value = aqi_metric["value"] if aqi_metric else 50
+@coalesced_router.get("/impact-score", response_model=ImpactScoreResponse)
+async def get_impact_score(metrics: MetricSet = Depends(get_metrics)):
+    aqi_value = metrics.aqi
     
     # Calculate scores based on AQI
     health_impact = max(0, 100 - aqi_value)
@@ -220,32 +268,50 @@ async def get_impact_score(lat: float, lon: float):
         ]
     }
 
-@router.get("/impact-simulation", response_model=ImpactSimulationResponse)
-async def get_impact_simulation(lat: float, lon: float):
-    metrics = await WeatherService.get_air_pollution(lat, lon)
-    
-    current_data = []
-    improved_data = []
-    reductions = {}
-    
-    for m in metrics:
-        val = m["value"]
-        improved_val = int(val * 0.6) # 40% reduction
-        
-        current_data.append({"category": m["title"], "value": val})
-        improved_data.append({"category": m["title"], "value": improved_val})
-        reductions[m["title"]] = 40
-        
-    return {
-        "currentData": current_data,
-        "improvedData": improved_data,
-        "reductionPercentages": reductions
-    }
+@coalesced_router.get("/impact-simulation", response_model=ImpactSimulationResponse)
+async def get_impact_simulation(
+    actions: Optional[List[str]] = Query(None),
+    coords: Coordinates = Depends(get_coordinates),
+):
+    # Without an explicit selection the whole action plan is applied
+    metrics, action_plan = await SimulationService.cell_plan(coords)
+    return SimulationService.simulate(metrics, action_plan, actions)
+
+@coalesced_router.get("/impact-simulation/scenarios", response_model=ImpactScenarioResponse)
+async def get_impact_scenarios(
+    limit: int = Query(10, ge=1, le=64),
+    coords: Coordinates = Depends(get_coordinates),
+):
+    metrics, action_plan = await SimulationService.cell_plan(coords)
+    return SimulationService.rank_scenarios(metrics, action_plan, limit)
 
 @router.post("/join", response_model=JoinResponse)
-async def join_climate_action(request: JoinRequest, db: Session = Depends(get_db)):
-    new_action = ClimateActionModel(email=request.email)
-    db.add(new_action)
-    db.commit()
-    db.refresh(new_action)
-    return new_action
+async def join_climate_action(
+    request: JoinRequest,
+    http_request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    email = request.email.strip().lower()
+    replay_key = ("join", idempotency_key)
+    if idempotency_key:
+        cached = idempotency_store.get(replay_key, email)
+        if cached is not None:
+            return cached
+
+    # Upsert on email: a returning member gets their existing row back. Rows written
+    # before emails were normalised may be mixed-case, so match case-insensitively.
+    action = db.query(ClimateActionModel).filter(func.lower(ClimateActionModel.email) == email).first()
+    if action is None:
+        write_limiter.check(client_id(http_request))
+        action = ClimateActionModel(email=email)
+        db.add(action)
+        db.commit()
+        db.refresh(action)
+
+    response = JoinResponse.model_validate(action)
+    if idempotency_key:
+        idempotency_store.put(replay_key, email, response)
+    return response
+
+router.include_router(coalesced_router)
@@ -9,5 +9,13 @@ class Settings(BaseSettings):
     OPENWEATHER_API_KEY: str = os.getenv("OPENWEATHER_API_KEY", "")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./ecolens.db")
+    WRITE_RATE_PER_SECOND: float = float(os.getenv("WRITE_RATE_PER_SECOND", "1"))
+    WRITE_BURST: int = int(os.getenv("WRITE_BURST", "5"))
+    TRUSTED_PROXY: bool = os.getenv("TRUSTED_PROXY", "").lower() in ("1", "true", "yes")
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    REPORT_REUSE_SECONDS: int = int(os.getenv("REPORT_REUSE_SECONDS", "600"))
+    COORD_PRECISION: int = int(os.getenv("COORD_PRECISION", "4"))
+    SIMULATION_CACHE_SECONDS: int = int(os.getenv("SIMULATION_CACHE_SECONDS", "300"))
+    COALESCE_REQUESTS: bool = os.getenv("COALESCE_REQUESTS", "true").lower() in ("1", "true", "yes")
 
 settings = Settings()
@@ -0,0 +1,35 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+from fastapi import HTTPException
+
+class IdempotencyStore:
+    # Remembers the response produced for an Idempotency-Key so retries and
+    # double-submits replay it instead of writing again. Each entry also records
+    # the request payload, so a key reused for a different payload is rejected.
+    # Entries expire after `ttl` seconds and the oldest are dropped beyond `max_entries`.
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, payload: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, stored_payload, value = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return None
+        if stored_payload != payload:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request payload",
+            )
+        return value
+
+    def put(self, key: Hashable, payload: Hashable, value: Any) -> None:
+        self.entries.pop(key, None)
+        self.entries[key] = (time.monotonic() + self.ttl, payload, value)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
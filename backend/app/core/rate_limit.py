@@ -0,0 +1,52 @@
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Request
+from app.core.config import settings
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+class RateLimiter:
+    # Per-client token buckets. Each client may burst up to `burst` requests and
+    # then gets `rate` requests per second. Only the most recently seen
+    # `max_clients` buckets are kept.
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def check(self, client: str) -> None:
+        now = time.monotonic()
+        bucket = self.buckets.pop(client, None)
+        if bucket is None:
+            bucket = TokenBucket(self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        self.buckets[client] = bucket
+        if len(self.buckets) > self.max_clients:
+            self.buckets.popitem(last=False)
+
+        if bucket.tokens < 1:
+            retry_after = (1 - bucket.tokens) / self.rate if self.rate > 0 else 60
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please slow down",
+                headers={"Retry-After": str(max(1, round(retry_after)))},
+            )
+        bucket.tokens -= 1
+
+def client_id(request: Request) -> str:
+    # X-Forwarded-For is caller-controlled, so it is only honoured behind a proxy
+    # (settings.TRUSTED_PROXY). The proxy appends the address it saw, which makes
+    # the rightmost entry the only one that cannot be spoofed.
+    if settings.TRUSTED_PROXY:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
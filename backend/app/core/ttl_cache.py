@@ -0,0 +1,27 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+class TTLCache:
+    # Small in-process cache: entries expire after `ttl` seconds and the least
+    # recently stored are dropped beyond `max_entries`.
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self.entries[key]
+            return None
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self.entries.pop(key, None)
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -106,6 +106,14 @@ class ImpactSimulationResponse(BaseModel):
     currentData: List[ImpactSimulationItem]
     improvedData: List[ImpactSimulationItem]
     reductionPercentages: Dict[str, int]
+    actions: List[str] = []
+    deltas: Dict[str, int] = {}
+    exposureReduction: Dict[str, int] = {}
+    score: Optional[int] = None
+
+class ImpactScenarioResponse(BaseModel):
+    baselineScore: int
+    scenarios: List[ImpactSimulationResponse]
 
 class JoinRequest(BaseModel):
     email: str
@@ -117,3 +125,9 @@ class JoinResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+class EdgeStatsResponse(BaseModel):
+    requests: int
+    computations: int
+    coalesced: int
+    ratio: float
@@ -1,8 +1,9 @@
 from typing import List, Dict
+from app.services.weather_service import MetricSet
 
 class AIService:
     @staticmethod
-    async def generate_insights(metrics: List[Dict]) -> str:
+    async def generate_insights(metrics: MetricSet) -> str:
         # Synthesis of an "AI" response based on the metrics.
         
         high_risks = [m["title"] for m in metrics if m["risk"] == "high"]
@@ -25,62 +26,77 @@ class AIService:
         return insight
 
     @staticmethod
-    async def get_action_plan(metrics: List[Dict]) -> List[Dict]:
-        # Generate actionable steps based on specific risks
+    async def get_action_plan(metrics: MetricSet) -> List[Dict]:
+        # Generate actionable steps based on specific risks. "target" names the
+        # MetricSet category an action's stated "impact" refers to, and "scope" says
+        # whether it lowers the area's risk index ("area") or only a person's
+        # exposure to it ("personal"). The simulation uses the percentage stated in
+        # "impact" as that reduction. Impacts that are not a percentage of the target
+        # (e.g. "Prevents 2kg waste per week") and actions without a target count as 0.
         actions = []
         
-        for m in metrics:
-            if m["title"] == "Air Quality":
-                if m["risk"] == "high":
-                    actions.append({
-                        "title": "Wear N95 masks outdoors",
-                        "why": "High PM2.5 levels detected during peak hours",
-                        "impact": "Reduces exposure by ~90%",
-                        "difficulty": "Easy",
-                        "color": "#FF5252"
-                    })
-                    actions.append({
-                        "title": "Use HEPA air purifiers",
-                        "why": "Indoor air quality can be affected by outdoor pollution",
-                        "impact": "Cleans 99.9% of indoor particles",
-                        "difficulty": "Medium",
-                        "color": "#FF5252"
-                    })
-                elif m["risk"] == "moderate":
-                    actions.append({
-                        "title": "Avoid heavy traffic areas",
-                        "why": "Localized pollution peaks near busy intersections",
-                        "impact": "Reduces particulate inhalation by 30%",
-                        "difficulty": "Easy",
-                        "color": "#FFC107"
-                    })
-            
-            if m["title"] == "Water Safety" and m["risk"] != "low":
-                actions.append({
-                    "title": "Use water filtration",
-                    "why": "Trace contaminants detected in regional supply",
-                    "impact": "Removes 95% of common contaminants",
-                    "difficulty": "Easy",
-                    "color": "#00B0FF"
-                })
-                
-            if m["title"] == "Climate Stress" and m["risk"] == "high":
-                actions.append({
-                    "title": "Stay hydrated and seek shade",
-                    "why": "Heat stress index is at critical levels",
-                    "impact": "Prevents heat-related illness",
-                    "difficulty": "Easy",
-                    "color": "#FF5252"
-                })
-                
-            if m["title"] == "Waste Pressure" and m["risk"] == "high":
-                actions.append({
-                    "title": "Join local cleanup drives",
-                    "why": "Community waste levels are exceeding local capacity",
-                    "impact": "Reduces local landfill pressure by 15%",
-                    "difficulty": "Medium",
-                    "color": "#00E676"
-                })
+        if metrics.air["risk"] == "high":
+            actions.append({
+                "title": "Wear N95 masks outdoors",
+                "why": "High PM2.5 levels detected during peak hours",
+                "impact": "Reduces exposure by ~90%",
+                "difficulty": "Easy",
+                "color": "#FF5252",
+                "target": "air",
+                "scope": "personal"
+            })
+            actions.append({
+                "title": "Use HEPA air purifiers",
+                "why": "Indoor air quality can be affected by outdoor pollution",
+                "impact": "Cleans 99.9% of indoor particles",
+                "difficulty": "Medium",
+                "color": "#FF5252",
+                "target": "air",
+                "scope": "personal"
+            })
+        elif metrics.air["risk"] == "moderate":
+            actions.append({
+                "title": "Avoid heavy traffic areas",
+                "why": "Localized pollution peaks near busy intersections",
+                "impact": "Reduces particulate inhalation by 30%",
+                "difficulty": "Easy",
+                "color": "#FFC107",
+                "target": "air",
+                "scope": "personal"
+            })
+
+        if metrics.water["risk"] != "low":
+            actions.append({
+                "title": "Use water filtration",
+                "why": "Trace contaminants detected in regional supply",
+                "impact": "Removes 95% of common contaminants",
+                "difficulty": "Easy",
+                "color": "#00B0FF",
+                "target": "water",
+                "scope": "personal"
+            })
+
+        if metrics.climate["risk"] == "high":
+            actions.append({
+                "title": "Stay hydrated and seek shade",
+                "why": "Heat stress index is at critical levels",
+                "impact": "Prevents heat-related illness",
+                "difficulty": "Easy",
+                "color": "#FF5252",
+                "target": "climate",
+                "scope": "personal"
+            })
+
+        if metrics.waste["risk"] == "high":
+            actions.append({
+                "title": "Join local cleanup drives",
+                "why": "Community waste levels are exceeding local capacity",
+                "impact": "Reduces local landfill pressure by 15%",
+                "difficulty": "Medium",
+                "color": "#00E676",
+                "target": "waste",
+                "scope": "area"
+            })
 
         # Default actions if list is short
         if len(actions) < 3:
@@ -97,14 +113,18 @@ class AIService:
                     "why": "Reduces methane emissions from landfills",
                     "impact": "Prevents 2kg waste per week",
                     "difficulty": "Easy",
-                    "color": "#00E676"
+                    "color": "#00E676",
+                    "target": "waste",
+                    "scope": "area"
                 },
                 {
                     "title": "Support Green Spaces",
                     "why": "Urban trees act as natural air filters",
                     "impact": "Absorbs 22kg CO2 annually",
                     "difficulty": "Medium",
-                    "color": "#00E676"
+                    "color": "#00E676",
+                    "target": "air",
+                    "scope": "area"
                 }
             ])
             
@@ -0,0 +1,136 @@
+import re
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.ttl_cache import TTLCache
+from app.services.ai_service import AIService
+from app.services.weather_service import WeatherService, MetricSet, Coordinates
+
+CATEGORIES = MetricSet._fields
+SCOPES = ("area", "personal")
+
+# Canonical cell -> (MetricSet, action plan). Slider changes for a cell that is
+# still cached skip the upstream metrics fetch and the plan rebuild entirely.
+_cells = TTLCache(settings.SIMULATION_CACHE_SECONDS)
+
+def score_values(values: Tuple[int, ...]) -> int:
+    # 0-100, higher is healthier: the mean headroom left under each risk index.
+    return round(sum(100 - min(v, 100) for v in values) / len(values))
+
+def stated_fraction(impact: str) -> float:
+    # "Reduces exposure by ~90%" -> 0.9; impacts without a percentage -> 0
+    match = re.search(r"(\d+(?:\.\d+)?)%", impact)
+    return float(match.group(1)) / 100 if match else 0.0
+
+@lru_cache(maxsize=1024)
+def _evaluate(
+    values: Tuple[int, ...],
+    area_factors: Tuple[Tuple[float, ...], ...],
+    exposure_factors: Tuple[Tuple[float, ...], ...],
+) -> Tuple[Tuple[Tuple[int, ...], int, Tuple[float, ...]], ...]:
+    # Evaluates every subset of the offered actions in a single pass. Scenario `mask`
+    # reuses the factors of `mask` minus its lowest action, so each scenario costs one
+    # multiply per category and dimension. Area factors scale the risk index;
+    # exposure factors are the share of personal exposure left after the actions.
+    # Memoised so every selection for a cached cell reuses the same table.
+    n = len(area_factors)
+    area = [(1.0,) * len(CATEGORIES)] * (1 << n)
+    exposure = [(1.0,) * len(CATEGORIES)] * (1 << n)
+    results = []
+    for mask in range(1 << n):
+        if mask:
+            low = mask & -mask
+            i = low.bit_length() - 1
+            area[mask] = tuple(r * f for r, f in zip(area[mask ^ low], area_factors[i]))
+            exposure[mask] = tuple(r * f for r, f in zip(exposure[mask ^ low], exposure_factors[i]))
+        projected = tuple(int(v * f) for v, f in zip(values, area[mask]))
+        results.append((projected, score_values(projected), exposure[mask]))
+    return tuple(results)
+
+def _action_factors(actions: List[Dict]) -> Tuple[Tuple[Tuple[float, ...], ...], Tuple[Tuple[float, ...], ...]]:
+    # Remaining fraction of each category's area risk index and personal exposure
+    # after each action, from the "target"/"scope" AIService.get_action_plan sets
+    # and the percentage stated in the action's "impact"
+    area, exposure = [], []
+    for a in actions:
+        target = a.get("target")
+        if target is not None and (target not in CATEGORIES or a.get("scope") not in SCOPES):
+            raise ValueError(f"Invalid target/scope for {a['title']!r}: {target!r}/{a.get('scope')!r}")
+        fraction = stated_fraction(a["impact"]) if target else 0.0
+        remaining = tuple(1 - fraction if c == target else 1.0 for c in CATEGORIES)
+        unchanged = (1.0,) * len(CATEGORIES)
+        area.append(remaining if a.get("scope") == "area" else unchanged)
+        exposure.append(remaining if a.get("scope") == "personal" else unchanged)
+    return tuple(area), tuple(exposure)
+
+class SimulationService:
+    @staticmethod
+    async def cell_plan(coords: Coordinates) -> Tuple[MetricSet, List[Dict]]:
+        # Metrics and action plan for the cell containing `coords`, at
+        # settings.COORD_PRECISION, cached for settings.SIMULATION_CACHE_SECONDS
+        cell = coords.canonical(settings.COORD_PRECISION)
+        cached = _cells.get(cell)
+        if cached is None:
+            metrics = await WeatherService.get_air_pollution(cell.lat, cell.lon)
+            cached = (metrics, await AIService.get_action_plan(metrics))
+            _cells.put(cell, cached)
+        return cached
+
+    @staticmethod
+    def _scenario(
+        metrics: MetricSet,
+        titles: Tuple[str, ...],
+        mask: int,
+        projected: Tuple[int, ...],
+        score: int,
+        exposure: Tuple[float, ...],
+    ) -> Dict:
+        return {
+            "actions": [t for i, t in enumerate(titles) if mask & (1 << i)],
+            "currentData": [{"category": m["title"], "value": m["value"]} for m in metrics],
+            "improvedData": [{"category": m["title"], "value": v} for m, v in zip(metrics, projected)],
+            "deltas": {m["title"]: v - m["value"] for m, v in zip(metrics, projected)},
+            "reductionPercentages": {
+                m["title"]: round(100 * (m["value"] - v) / m["value"]) if m["value"] else 0
+                for m, v in zip(metrics, projected)
+            },
+            "exposureReduction": {m["title"]: round(100 * (1 - f)) for m, f in zip(metrics, exposure)},
+            "score": score,
+        }
+
+    @staticmethod
+    def simulate(metrics: MetricSet, actions: List[Dict], selected: Optional[List[str]] = None) -> Dict:
+        # Projects a single scenario. Defaults to applying the whole action plan.
+        titles = tuple(a["title"] for a in actions)
+        chosen = set(titles if selected is None else selected)
+        unknown = chosen.difference(titles)
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Actions not in the current action plan: {', '.join(sorted(unknown))}",
+            )
+        mask = sum(1 << i for i, t in enumerate(titles) if t in chosen)
+        values = tuple(m["value"] for m in metrics)
+        evaluated = _evaluate(values, *_action_factors(actions))
+        return SimulationService._scenario(metrics, titles, mask, *evaluated[mask])
+
+    @staticmethod
+    def rank_scenarios(metrics: MetricSet, actions: List[Dict], limit: int = 10) -> Dict:
+        # Ranks every non-empty combination of the action plan by projected area
+        # score, then by total personal exposure reduction, preferring fewer actions
+        # when both tie.
+        titles = tuple(a["title"] for a in actions)
+        values = tuple(m["value"] for m in metrics)
+        evaluated = _evaluate(values, *_action_factors(actions))
+        order = sorted(
+            range(1, len(evaluated)),
+            key=lambda mask: (-evaluated[mask][1], sum(evaluated[mask][2]), bin(mask).count("1"), mask),
+        )
+        return {
+            "baselineScore": evaluated[0][1],
+            "scenarios": [
+                SimulationService._scenario(metrics, titles, mask, *evaluated[mask])
+                for mask in order[:limit]
+            ],
+        }
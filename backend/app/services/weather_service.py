@@ -1,11 +1,49 @@
 import httpx
-from fastapi import HTTPException
+from fastapi import HTTPException, Depends
 from app.core.config import settings
-from typing import List, Dict
+from typing import Dict, NamedTuple, TypedDict
+
+RISK_COLORS = {"high": "#FF5252", "moderate": "#FFC107", "low": "#00E676"}
+
+def classify_risk(val: int) -> str:
+    if val > 80: return "high"
+    if val > 50: return "moderate"
+    return "low"
+
+class Coordinates(NamedTuple):
+    lat: float
+    lon: float
+
+    def canonical(self, precision: int) -> "Coordinates":
+        # + 0.0 folds -0.0 into 0.0 so both hash to the same cell
+        return Coordinates(round(self.lat, precision) + 0.0, round(self.lon, precision) + 0.0)
+
+class MetricEntry(TypedDict):
+    title: str
+    risk: str
+    description: str
+    value: int
+    color: str
+
+class MetricSet(NamedTuple):
+    # One metric entry per category, in snapshot order. Iterating yields the
+    # metrics themselves, so a MetricSet can be returned wherever a list is expected.
+    air: MetricEntry
+    water: MetricEntry
+    climate: MetricEntry
+    waste: MetricEntry
+
+    @property
+    def aqi(self) -> int:
+        return self.air["value"]
+
+    @property
+    def risk_level(self) -> str:
+        return self.air["risk"]
 
 class WeatherService:
     @staticmethod
-    async def get_air_pollution(lat: float, lon: float) -> List[Dict]:
+    async def get_air_pollution(lat: float, lon: float) -> MetricSet:
         if not settings.OPENWEATHER_API_KEY or "your_" in settings.OPENWEATHER_API_KEY:
             # Region-aware pseudo-AI logic
             # Tropical regions (near equator)
@@ -34,22 +72,17 @@ class WeatherService:
             climate_val = climate_base + (seed % 15)
             waste_val = waste_base + (seed % 25)
             
-            def get_risk(val):
-                if val > 80: return "high", "#FF5252"
-                if val > 50: return "moderate", "#FFC107"
-                return "low", "#00E676"
-            
-            aqi_risk, aqi_color = get_risk(aqi_val)
-            water_risk, water_color = get_risk(water_val)
-            climate_risk, climate_color = get_risk(climate_val)
-            waste_risk, waste_color = get_risk(waste_val)
-
-            return [
-                {"title": "Air Quality", "risk": aqi_risk, "description": f"{'Unsafe' if aqi_risk == 'high' else 'Moderate'} conditions detected. AI analysis suggests local industrial influence.", "value": aqi_val, "color": aqi_color},
-                {"title": "Water Safety", "risk": water_risk, "description": f"Regional water quality is {'stable' if water_risk == 'low' else 'under monitoring'}. AI recommends filtration.", "value": water_val, "color": water_color},
-                {"title": "Climate Stress", "risk": climate_risk, "description": "Temperature and humidity variations may impact localized comfort levels.", "value": climate_val, "color": climate_color},
-                {"title": "Waste Pressure", "risk": waste_risk, "description": "Waste density levels fluctuate based on local collection cycles.", "value": waste_val, "color": waste_color},
-            ]
+            aqi_risk = classify_risk(aqi_val)
+            water_risk = classify_risk(water_val)
+            climate_risk = classify_risk(climate_val)
+            waste_risk = classify_risk(waste_val)
+
+            return MetricSet(
+                air={"title": "Air Quality", "risk": aqi_risk, "description": f"{'Unsafe' if aqi_risk == 'high' else 'Moderate'} conditions detected. AI analysis suggests local industrial influence.", "value": aqi_val, "color": RISK_COLORS[aqi_risk]},
+                water={"title": "Water Safety", "risk": water_risk, "description": f"Regional water quality is {'stable' if water_risk == 'low' else 'under monitoring'}. AI recommends filtration.", "value": water_val, "color": RISK_COLORS[water_risk]},
+                climate={"title": "Climate Stress", "risk": climate_risk, "description": "Temperature and humidity variations may impact localized comfort levels.", "value": climate_val, "color": RISK_COLORS[climate_risk]},
+                waste={"title": "Waste Pressure", "risk": waste_risk, "description": "Waste density levels fluctuate based on local collection cycles.", "value": waste_val, "color": RISK_COLORS[waste_risk]},
+            )
 
         try:
             async with httpx.AsyncClient() as client:
@@ -72,12 +105,12 @@ class WeatherService:
                 
                 risk, value, desc = aqi_map.get(aqi, ("moderate", 50, "Data unavailable"))
 
-                return [
-                    {"title": "Air Quality", "risk": risk, "description": desc, "value": value, "color": "#FF5252" if risk == "high" else ("#FFC107" if risk == "moderate" else "#00E676")},
-                    {"title": "Water Safety", "risk": "moderate", "description": "Regional water quality data is currently being synthesized.", "value": 45, "color": "#00B0FF"},
-                    {"title": "Climate Stress", "risk": "low", "description": "Stable climatic conditions observed in this quadrant.", "value": 28, "color": "#FFC107"},
-                    {"title": "Waste Pressure", "risk": "low", "description": "Optimized waste collection cycle in progress.", "value": 15, "color": "#00E676"},
-                ]
+                return MetricSet(
+                    air={"title": "Air Quality", "risk": risk, "description": desc, "value": value, "color": RISK_COLORS[risk]},
+                    water={"title": "Water Safety", "risk": "moderate", "description": "Regional water quality data is currently being synthesized.", "value": 45, "color": "#00B0FF"},
+                    climate={"title": "Climate Stress", "risk": "low", "description": "Stable climatic conditions observed in this quadrant.", "value": 28, "color": "#FFC107"},
+                    waste={"title": "Waste Pressure", "risk": "low", "description": "Optimized waste collection cycle in progress.", "value": 15, "color": "#00E676"},
+                )
         except Exception as e:
             if isinstance(e, HTTPException):
                 raise e
@@ -130,3 +163,19 @@ class WeatherService:
             if isinstance(e, HTTPException):
                 raise e
             raise HTTPException(status_code=500, detail=str(e))
+
+# lat/lon are declared only in these dependencies. Handlers and get_metrics both
+# consume the validated Coordinates, so each query parameter is validated once.
+def get_coordinates(lat: float, lon: float) -> Coordinates:
+    return Coordinates(lat, lon)
+
+def get_coordinates_or_origin(lat: float = 0, lon: float = 0) -> Coordinates:
+    return Coordinates(lat, lon)
+
+async def get_metrics(coords: Coordinates = Depends(get_coordinates)) -> MetricSet:
+    # Request-scoped dependency: FastAPI caches it per request, so every consumer
+    # of the same request shares one MetricSet.
+    return await WeatherService.get_air_pollution(coords.lat, coords.lon)
+
+async def get_metrics_or_origin(coords: Coordinates = Depends(get_coordinates_or_origin)) -> MetricSet:
+    return await WeatherService.get_air_pollution(coords.lat, coords.lon)
@@ -0,0 +1,62 @@
+"""Benchmark the POST /join and /report write paths.
+
+Replays a burst of submissions in which most requests are retries or
+double-clicks, then reports request throughput against the rows that
+actually reached SQLite. Runs against a throwaway database:
+
+    cd backend
+    python benchmarks/write_throughput.py --requests 2000 --unique 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--unique", type=int, default=50, help="distinct submissions per endpoint")
+    parser.add_argument("--rate", type=float, default=1e6, help="WRITE_RATE_PER_SECOND for the run")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["WRITE_RATE_PER_SECOND"] = str(args.rate)
+    os.environ["WRITE_BURST"] = str(max(1, int(args.rate)))
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core.database import SessionLocal
+    from app.models.history import ClimateAction, EnvironmentalReport
+
+    client = TestClient(app)
+    keys = [str(uuid.uuid4()) for _ in range(args.unique)]
+
+    for endpoint in ("join", "report"):
+        statuses = {}
+        start = time.perf_counter()
+        for i in range(args.requests):
+            n = i % args.unique
+            if endpoint == "join":
+                body = {"email": f"member{n}@example.com"}
+            else:
+                body = {"lat": 40 + n / 100, "lon": -74.0, "name": f"Cell {n}"}
+            response = client.post(f"/api/{endpoint}", json=body, headers={"Idempotency-Key": keys[n]})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        elapsed = time.perf_counter() - start
+
+        db = SessionLocal()
+        model = ClimateAction if endpoint == "join" else EnvironmentalReport
+        rows = db.query(model).count()
+        db.close()
+        print(
+            f"/{endpoint}: {args.requests} requests in {elapsed:.2f}s "
+            f"({args.requests / elapsed:.0f} req/s), {rows} rows written, statuses {statuses}"
+        )
+
+if __name__ == "__main__":
+    main()